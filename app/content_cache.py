@@ -0,0 +1,238 @@
+# content_cache.py
+"""
+Response caches for the Gemini-backed content services.
+Provides:
+- Exact-match cache: byte-identical requests never reach Gemini twice,
+  including concurrent ones (single-flight)
+- Semantic cache: paraphrased inputs resolve to a previously generated response
+
+The exact-match cache is checked first and lives on disk (shared by all
+workers). The semantic cache is in-process, persisted to disk on shutdown
+and restored on import.
+"""
+
+import asyncio
+import hashlib
+import functools
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import orjson
+import joblib
+from diskcache import Cache
+
+from .embeddings import EMBEDDING_DIM
+
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+SEMANTIC_CACHE_FILE = CACHE_DIR / "semantic_cache.joblib"
+EXACT_CACHE_DIR = CACHE_DIR / "llm"
+
+
+class UncachedResult(dict):
+    """A response that must not be cached (e.g. a fallback after a parsing error)."""
+
+
+# ==========================================================
+#   EXACT-MATCH CACHE
+# ==========================================================
+class LLMCache:
+    """Exact-match LLM response cache keyed by SHA-256 of the full request."""
+
+    def __init__(self, directory: Path):
+        self._cache = Cache(str(directory))
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @staticmethod
+    def make_key(fn: str, args: list, model: str, temperature: float) -> str:
+        """Build a deterministic cache key for one model call."""
+        payload = orjson.dumps(
+            {"fn": fn, "args": args, "model": model, "temperature": temperature},
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached response for key, or None."""
+        value = self._cache.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(value)
+
+    def set(self, key: str, value: dict, ttl: Optional[float] = None):
+        """Store a response, optionally expiring after ttl seconds."""
+        self._cache.set(key, dict(value), expire=ttl)
+
+
+exact_llm_cache = LLMCache(EXACT_CACHE_DIR)
+
+
+# Calls currently waiting on Gemini, by exact-cache key
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def exact_cache(model: str, temperature: float, ttl: float = 3600):
+    """
+    Decorator for async content service functions returning a dict.
+    Identical calls (same function, arguments, model and temperature) are
+    answered from the exact-match cache for up to ttl seconds. Identical
+    calls that arrive while the first is still running share its result
+    instead of calling Gemini again.
+    """
+    def decorator(fn):
+        async def call_and_store(key, args, kwargs):
+            result = await fn(*args, **kwargs)
+            if not isinstance(result, UncachedResult):
+                exact_llm_cache.set(key, result, ttl=ttl)
+            return result
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = LLMCache.make_key(
+                fn.__name__, [list(args), sorted(kwargs.items())], model, temperature
+            )
+            cached = exact_llm_cache.get(key)
+            if cached is not None:
+                return cached
+
+            task = _inflight.get(key)
+            if task is None:
+                task = asyncio.create_task(call_and_store(key, args, kwargs))
+                _inflight[key] = task
+                task.add_done_callback(lambda done: _inflight.pop(key, None))
+
+            # Shielded so one caller disconnecting does not cancel the shared call
+            result = await asyncio.shield(task)
+            return type(result)(result)
+        return wrapper
+    return decorator
+
+
+# ==========================================================
+#   SEMANTIC CACHE
+# ==========================================================
+class SemanticCache:
+    """
+    In-process LRU cache of responses keyed by L2-normalized prompt embeddings.
+
+    All vectors live in one contiguous (maxsize, dim) float32 matrix, so a
+    lookup is a single matrix-vector product over every cached entry.
+    Entries are partitioned by scope (e.g. "summarize", "caption:instagram")
+    so a hit can only return a response produced by the same kind of call.
+    """
+
+    def __init__(self, maxsize: int = 1024, dim: int = EMBEDDING_DIM):
+        self.maxsize = maxsize
+        self.dim = dim
+        self.hits = 0
+        self.misses = 0
+        self._vectors = np.zeros((maxsize, dim), dtype=np.float32)
+        self._scopes = np.full(maxsize, -1, dtype=np.int64)
+        self._responses: list[Optional[dict]] = [None] * maxsize
+        self._lru: OrderedDict[int, None] = OrderedDict()  # slot -> None, oldest first
+        self._scope_ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def lookup(self, scope: str, vector: np.ndarray, threshold: float) -> Optional[dict]:
+        """Return the closest cached response in scope if its similarity >= threshold."""
+        scope_id = self._scope_ids.get(scope)
+        if scope_id is None or not self._lru:
+            self.misses += 1
+            return None
+
+        sims = self._vectors @ vector
+        sims[self._scopes != scope_id] = -1.0
+        slot = int(np.argmax(sims))
+
+        if sims[slot] < threshold:
+            self.misses += 1
+            return None
+
+        self._lru.move_to_end(slot)
+        self.hits += 1
+        return dict(self._responses[slot])
+
+    def insert(self, scope: str, vector: np.ndarray, response: dict):
+        """Store a response, evicting the least recently used entry when full."""
+        if len(self._lru) < self.maxsize:
+            slot = len(self._lru)
+        else:
+            slot, _ = self._lru.popitem(last=False)
+
+        scope_id = self._scope_ids.setdefault(scope, len(self._scope_ids))
+        self._vectors[slot] = vector
+        self._scopes[slot] = scope_id
+        self._responses[slot] = dict(response)
+        self._lru[slot] = None
+
+    def save(self, path: Path):
+        """Persist cache contents with joblib."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({
+            "dim": self.dim,
+            "vectors": self._vectors,
+            "scopes": self._scopes,
+            "responses": self._responses,
+            "lru": list(self._lru),
+            "scope_ids": self._scope_ids,
+        }, path)
+
+    @classmethod
+    def load(cls, path: Path, maxsize: int = 1024) -> "SemanticCache":
+        """Restore a cache saved with `save`; returns an empty cache if unavailable."""
+        cache = cls(maxsize=maxsize)
+        if not path.exists():
+            return cache
+
+        try:
+            state = joblib.load(path)
+        except Exception as e:
+            print(f"[Warning] Could not load semantic cache: {e}")
+            return cache
+
+        if state.get("dim") != cache.dim:
+            return cache
+
+        # Keep the most recently used entries when the saved cache was larger
+        cache._scope_ids = dict(state["scope_ids"])
+        for old_slot in state["lru"][-maxsize:]:
+            slot = len(cache._lru)
+            cache._vectors[slot] = state["vectors"][old_slot]
+            cache._scopes[slot] = state["scopes"][old_slot]
+            cache._responses[slot] = state["responses"][old_slot]
+            cache._lru[slot] = None
+        return cache
+
+
+semantic_cache = SemanticCache.load(SEMANTIC_CACHE_FILE)
+
+
+def save_semantic_cache():
+    """Persist the semantic cache (called on application shutdown)."""
+    semantic_cache.save(SEMANTIC_CACHE_FILE)
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters and sizes for both cache layers."""
+    return {
+        "exact_cache": {
+            "hits": exact_llm_cache.hits,
+            "misses": exact_llm_cache.misses,
+            "size": len(exact_llm_cache),
+        },
+        "semantic_cache": {
+            "hits": semantic_cache.hits,
+            "misses": semantic_cache.misses,
+            "size": len(semantic_cache),
+        },
+    }
@@ -2,19 +2,34 @@
 """
 Content Services powered by Google Gemini API.
 Provides:
-- Similarity checking
+- Similarity checking (local sentence embeddings, optional Gemini analysis)
 - Social media caption generation
 - Text summarization
 
+Responses are served from an exact-match cache for repeated requests and
+from a semantic cache when a sufficiently similar request has been
+answered before (see content_cache.py).
+
 Requires GEMINI_API_KEY in .env file.
 """
 
 import os
-import json
+import sys
+import asyncio
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
+from typing import AsyncIterator
+import httpx
+import numpy as np
+import orjson
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
+from pydantic import BaseModel
+
+from .content_cache import semantic_cache, exact_cache, UncachedResult
+from .embeddings import embed, fits_window, quantize, int8_scores, EMBEDDING_DIM
 
 # Load environment variables from .env file
 # Look for .env in the project root (parent of app directory)
@@ -27,121 +42,496 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     print("[Warning] GEMINI_API_KEY not found in environment. Content services will not work.")
 
-# Content store for similarity checking
-CONTENT_STORE_FILE = Path(__file__).resolve().parent / "content_store.json"
-
-
+# Content store for similarity checking (append-only JSON Lines log)
+CONTENT_STORE_FILE = Path(__file__).resolve().parent / "content_store.jsonl"
+LEGACY_CONTENT_STORE_FILE = Path(__file__).resolve().parent / "content_store.json"
+
+_STORE: list | None = None        # live items, loaded lazily
+_STORE_INDEX: dict[str, int] = {}  # item id -> position in _STORE
+_STORE_LOCK = asyncio.Lock()
+_LOG_LINES = 0                     # lines currently in the log file
+_COMPACTION_TASK: asyncio.Task | None = None
+
+# int8-quantized embedding matrix of the content store, one row (and scale) per item.
+# Held in buffers with spare capacity; only the first _STORE_ROWS rows are in use.
+STORE_EMBEDDINGS_FILE = Path(__file__).resolve().parent / "content_store_embeddings.npy"
+STORE_SCALES_FILE = Path(__file__).resolve().parent / "content_store_scales.npy"
+_STORE_EMBEDDINGS: np.ndarray | None = None
+_STORE_SCALES: np.ndarray | None = None
+_STORE_ROWS = 0
+
+# Gemini model and sampling temperature per service (also part of the exact cache key)
+GEMINI_MODEL = "gemini-flash-lite-latest"
+# Summaries default to the same lite model; set SUMMARIZE_MODEL (e.g. gemini-2.5-flash) to opt up
+SUMMARIZE_MODEL = os.getenv("SUMMARIZE_MODEL", GEMINI_MODEL)
+SIMILARITY_TEMPERATURE = 0.2
+CAPTION_TEMPERATURE = 0.7
+SUMMARIZE_TEMPERATURE = 0.3
+
+# Minimum cosine similarity for a semantic cache hit.
+# Summaries use a stricter threshold since callers expect them to be faithful.
+SIMILARITY_CACHE_THRESHOLD = 0.87
+CAPTION_CACHE_THRESHOLD = 0.87
+SUMMARIZE_CACHE_THRESHOLD = 0.95
+
+
+@lru_cache(maxsize=1)
 def get_gemini_client():
-    """Get initialized Gemini client."""
+    """
+    Get the shared Gemini client (created once, connections are reused).
+    Calls go through the async surface (`client.aio`) over a pooled HTTP/2
+    connection, so waiting on Gemini never blocks the event loop.
+    """
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY not configured. Please set it in .env file.")
-    return genai.Client(api_key=GEMINI_API_KEY)
+    return genai.Client(
+        api_key=GEMINI_API_KEY,
+        http_options=types.HttpOptions(
+            async_client_args={
+                "http2": True,
+                "limits": httpx.Limits(max_keepalive_connections=32),
+            }
+        ),
+    )
+
+
+def _read_content_log() -> list:
+    """Read the content log (or the legacy JSON store) into a list of items."""
+    global _LOG_LINES
+
+    if not CONTENT_STORE_FILE.exists():
+        if LEGACY_CONTENT_STORE_FILE.exists():
+            try:
+                return orjson.loads(LEGACY_CONTENT_STORE_FILE.read_bytes() or b"[]")
+            except orjson.JSONDecodeError:
+                return []
+        return []
+
+    items = []
+    with CONTENT_STORE_FILE.open("rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            _LOG_LINES += 1
+            try:
+                items.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                continue  # skip a torn trailing write
+    return items
 
 
 def load_content_store() -> list:
-    """Load existing content for similarity comparison."""
-    if CONTENT_STORE_FILE.exists():
-        try:
-            return json.loads(CONTENT_STORE_FILE.read_text())
-        except json.JSONDecodeError:
-            return []
-    return []
+    """
+    Load existing content for similarity comparison.
+    The log is read once; later calls return the in-memory store.
+    Items sharing an "id" replace each other (the latest entry wins).
+    """
+    global _STORE
+
+    if _STORE is None:
+        _STORE = []
+        for item in _read_content_log():
+            _add_to_store(item)
+        if _STORE and not CONTENT_STORE_FILE.exists():
+            _write_content_log(_STORE)  # migrate the legacy JSON store
+    return _STORE
+
+
+def _add_to_store(item: dict) -> int:
+    """Insert or replace an item in the in-memory store; returns its position."""
+    item_id = item.get("id")
+    if item_id is not None and item_id in _STORE_INDEX:
+        position = _STORE_INDEX[item_id]
+        _STORE[position] = item
+        return position
+    if item_id is not None:
+        _STORE_INDEX[item_id] = len(_STORE)
+    _STORE.append(item)
+    return len(_STORE) - 1
+
+
+def _read_store_embeddings(n_items: int):
+    """Memory-map the saved int8 matrix and its scales; None if missing or stale."""
+    if not (STORE_EMBEDDINGS_FILE.exists() and STORE_SCALES_FILE.exists()):
+        return None
+    matrix = np.load(STORE_EMBEDDINGS_FILE, mmap_mode="r")
+    scales = np.load(STORE_SCALES_FILE, mmap_mode="r")
+    if (
+        matrix.dtype != np.int8
+        or matrix.shape != (n_items, EMBEDDING_DIM)
+        or scales.shape != (n_items,)
+    ):
+        return None
+    return matrix, scales
+
+
+def load_store_embeddings() -> tuple[np.ndarray, np.ndarray]:
+    """
+    Load the embedding matrix of the content store.
+    Row i is the int8-quantized normalized embedding of item i's "content"
+    (see `embeddings.quantize`), stored as one contiguous (N, EMBEDDING_DIM)
+    int8 array plus N float32 scales, both memory-mapped from disk.
+    The files are only trusted when nothing was appended since the last
+    compaction; otherwise they are rebuilt from the store.
+    Returns views of the rows in use.
+    """
+    global _STORE_EMBEDDINGS, _STORE_SCALES, _STORE_ROWS
+
+    if _STORE_EMBEDDINGS is None:
+        store = load_content_store()
+        saved = _read_store_embeddings(len(store)) if _LOG_LINES == len(store) else None
+        if saved is not None:
+            matrix, scales = saved
+        elif store:
+            matrix, scales = quantize(embed([item.get("content", "") for item in store]))
+        else:
+            matrix = np.empty((0, EMBEDDING_DIM), dtype=np.int8)
+            scales = np.empty(0, dtype=np.float32)
+        _STORE_EMBEDDINGS, _STORE_SCALES = matrix, scales
+        _STORE_ROWS = len(matrix)
+    return _STORE_EMBEDDINGS[:_STORE_ROWS], _STORE_SCALES[:_STORE_ROWS]
+
+
+def _reserve_store_embeddings(rows: int):
+    """
+    Make the embedding buffers writable with room for `rows` rows.
+    Capacity doubles when full, so appends are amortized O(1); the
+    read-only mmap is copied into memory on the first write only.
+    """
+    global _STORE_EMBEDDINGS, _STORE_SCALES
+
+    capacity = len(_STORE_EMBEDDINGS)
+    if rows <= capacity and _STORE_EMBEDDINGS.flags.writeable:
+        return
+    capacity = max(rows, 2 * capacity, 64)
+    matrix = np.empty((capacity, EMBEDDING_DIM), dtype=np.int8)
+    scales = np.empty(capacity, dtype=np.float32)
+    matrix[:_STORE_ROWS] = _STORE_EMBEDDINGS[:_STORE_ROWS]
+    scales[:_STORE_ROWS] = _STORE_SCALES[:_STORE_ROWS]
+    _STORE_EMBEDDINGS, _STORE_SCALES = matrix, scales
+
+
+def _save_array(path: Path, array: np.ndarray):
+    """Atomically write one array next to the content log."""
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def _save_store_embeddings(matrix: np.ndarray, scales: np.ndarray):
+    """Persist the quantized embedding matrix and its scales."""
+    _save_array(STORE_SCALES_FILE, scales)
+    _save_array(STORE_EMBEDDINGS_FILE, matrix)
+
+
+async def append_content(item: dict):
+    """
+    Add an item to the content store.
+    Only the new item is written (one appended line); the log is compacted
+    in the background once it holds more than twice the live item count.
+    """
+    global _LOG_LINES, _COMPACTION_TASK, _STORE_ROWS
+
+    vector = (await asyncio.to_thread(embed, [item.get("content", "")]))[0]
+    codes, scale = quantize(vector)
+
+    async with _STORE_LOCK:
+        await asyncio.to_thread(load_store_embeddings)
+        position = _add_to_store(item)
+        _reserve_store_embeddings(max(position + 1, _STORE_ROWS))
+        _STORE_EMBEDDINGS[position] = codes[0]
+        _STORE_SCALES[position] = scale[0]
+        _STORE_ROWS = max(_STORE_ROWS, position + 1)
+
+        with CONTENT_STORE_FILE.open("ab") as f:
+            f.write(orjson.dumps(item) + b"\n")
+        _LOG_LINES += 1
+
+        if _LOG_LINES > 2 * len(_STORE) and (_COMPACTION_TASK is None or _COMPACTION_TASK.done()):
+            _COMPACTION_TASK = asyncio.create_task(compact_content_store())
+
+
+def _write_content_log(store: list):
+    """Atomically replace the log with one line per live item."""
+    global _LOG_LINES
+
+    tmp = CONTENT_STORE_FILE.with_suffix(".tmp")
+    tmp.write_bytes(b"".join(orjson.dumps(item) + b"\n" for item in store))
+    os.replace(tmp, CONTENT_STORE_FILE)
+    _LOG_LINES = len(store)
+
+
+async def compact_content_store():
+    """Compact the content log, dropping superseded entries, and persist embeddings."""
+    async with _STORE_LOCK:
+        if _STORE is None:
+            return  # never loaded, nothing changed
+        matrix, scales = await asyncio.to_thread(load_store_embeddings)
+        _write_content_log(_STORE)
+        _save_store_embeddings(matrix, scales)
+
+
+async def semantic_lookup(scope: str, text: str, threshold: float):
+    """
+    Embed text and look it up in the semantic cache.
+
+    Returns:
+        (vector, cached_response). vector is None when the text cannot be
+        cached (too long for the embedding window, or embedding failed).
+    """
+    try:
+        if not await asyncio.to_thread(fits_window, text):
+            return None, None
+        vector = (await asyncio.to_thread(embed, [text]))[0]
+    except Exception as e:
+        print(f"[Warning] Semantic cache unavailable: {e}")
+        return None, None
+    return vector, semantic_cache.lookup(scope, vector, threshold)
+
+
+# ==========================================================
+#   PROMPT TEMPLATES
+# ==========================================================
+# Static prompt text is built once at import; each call only joins these
+# parts with the request fields.
+_SIMILARITY_PROMPT_HEAD = """You are a content originality and similarity analyzer. Compare the following two texts and provide a detailed analysis.
 
+Text 1 (Content being checked):
+"""
+_SIMILARITY_PROMPT_TEXT_2 = """
 
-def save_content_store(content: list):
-    """Save content store to file."""
-    CONTENT_STORE_FILE.write_text(json.dumps(content, indent=2))
+Text 2 (Reference content):
+"""
+_SIMILARITY_PROMPT_RATING = '\n\nAn embedding model rated the semantic similarity of these texts as "'
+_SIMILARITY_PROMPT_SCORE = '" (cosine similarity '
+_SIMILARITY_PROMPT_TAIL = """).
+
+Analyze these texts and return a JSON object with the following fields:
+
+1. "originality_assessment": string - A 2-3 sentence assessment of whether Text 1 appears to be original content or if it seems derived from Text 2. Consider if it's a copy, paraphrase, inspired by, or completely independent.
+
+2. "detailed_analysis": string - A 3-4 sentence detailed analysis explaining:
+   - What specific similarities exist (if any)
+   - What differences exist
+   - Key themes or topics in each text
+   - Your conclusion about the relationship between the texts"""
+
+_CAPTION_PROMPT_HEAD = "Generate a social media caption for "
+_CAPTION_PROMPT_TITLE = ".\n\nContent Title: "
+_CAPTION_PROMPT_DESCRIPTION = "\nContent Description: "
+_CAPTION_PROMPT_GUIDE = "\n\nPlatform Guidelines: "
+_CAPTION_PROMPT_TAIL = "\n\nGenerate ONLY the caption text, nothing else. Do not include any explanations or metadata."
+
+_SUMMARIZE_PROMPT_HEAD = """Summarize the following content concisely. Focus on the key points and main takeaways.
+Keep the summary brief but informative.
+
+Content:
+"""
+_SUMMARIZE_PROMPT_TAIL = """
+
+Provide ONLY the summary, nothing else."""
 
 
 # ==========================================================
 #   SIMILARITY CHECK
 # ==========================================================
-async def check_similarity(content_1: str, content_2: str) -> dict:
+# Lower bound of cosine similarity for each similarity level, highest first
+SIMILARITY_LEVELS = [
+    (0.95, "identical"),
+    (0.87, "very_similar"),
+    (0.75, "similar"),
+    (0.55, "somewhat_similar"),
+]
+
+# Levels at which contents count as similar
+SIMILAR_LEVELS = {"identical", "very_similar", "similar"}
+
+ORIGINALITY_ASSESSMENTS = {
+    "identical": "Text 1 appears to be a copy of Text 2; the two are nearly word-for-word identical.",
+    "very_similar": "Text 1 closely mirrors the meaning of Text 2 and is likely a paraphrase or derivative of it.",
+    "similar": "Text 1 covers the same topic as Text 2 with overlapping ideas, but its presentation appears to be its own.",
+    "somewhat_similar": "Text 1 touches on themes related to Text 2 but has a different focus, and appears largely original.",
+    "different": "Text 1 appears to be original content, independent of Text 2.",
+}
+
+
+def similarity_level_for(score: float) -> str:
+    """Map a cosine similarity score to a similarity level."""
+    for threshold, level in SIMILARITY_LEVELS:
+        if score >= threshold:
+            return level
+    return "different"
+
+
+@exact_cache(model=GEMINI_MODEL, temperature=SIMILARITY_TEMPERATURE)
+async def check_similarity(content_1: str, content_2: str, include_detailed_analysis: bool = False) -> dict:
     """
-    Check similarity between two provided contents using Gemini.
-    Provides detailed analysis of originality and similarity.
+    Check similarity between two provided contents.
+    The similarity level is computed locally from the cosine similarity of
+    sentence embeddings. Gemini is only called when a written analysis is
+    requested.
     
     Args:
         content_1: First content text to compare
         content_2: Second content text to compare
+        include_detailed_analysis: Ask Gemini for the originality assessment and
+            detailed analysis instead of the built-in descriptions
         
     Returns:
-        dict with is_similar, similarity_level, originality_assessment, detailed_analysis
+        dict with is_similar, similarity_level, similarity_score, originality_assessment, detailed_analysis
     """
     try:
-        client = get_gemini_client()
-        
-        prompt = f"""You are a content originality and similarity analyzer. Compare the following two texts and provide a detailed analysis.
+        vectors = await asyncio.to_thread(embed, [content_1, content_2])
+        score = float(vectors[0] @ vectors[1])
+        level = similarity_level_for(score)
+
+        result = {
+            "is_similar": level in SIMILAR_LEVELS,
+            "similarity_level": level,
+            "similarity_score": score,
+            "originality_assessment": ORIGINALITY_ASSESSMENTS[level],
+            "detailed_analysis": f"The texts have a semantic similarity score of {score:.2f}, rated '{level}'."
+        }
 
-Text 1 (Content being checked):
-{content_1}
+        if include_detailed_analysis:
+            analysis = await analyze_similarity(content_1, content_2, level, score)
+            result.update(analysis)
+            if isinstance(analysis, UncachedResult):
+                return UncachedResult(result)
 
-Text 2 (Reference content):
-{content_2}
+        return result
 
-Analyze these texts and return a JSON object with the following fields:
+    except Exception as e:
+        raise Exception(f"Similarity check failed: {str(e)}")
 
-1. "is_similar": boolean - true if the contents share significant similarity in meaning, topic, or phrasing; false if they are substantially different
 
-2. "similarity_level": string - one of these exact values:
-   - "identical" - texts are the same or nearly word-for-word copies
-   - "very_similar" - same topic with very similar ideas and structure, possibly paraphrased
-   - "similar" - same topic with overlapping ideas but different presentation
-   - "somewhat_similar" - related topics or themes but different focus
-   - "different" - unrelated or completely different content
+class SimilarityAnalysis(BaseModel):
+    """Structured Gemini output for the written similarity analysis."""
+    originality_assessment: str
+    detailed_analysis: str
 
-3. "originality_assessment": string - A 2-3 sentence assessment of whether Text 1 appears to be original content or if it seems derived from Text 2. Consider if it's a copy, paraphrase, inspired by, or completely independent.
 
-4. "detailed_analysis": string - A 3-4 sentence detailed analysis explaining:
-   - What specific similarities exist (if any)
-   - What differences exist
-   - Key themes or topics in each text
-   - Your conclusion about the relationship between the texts
+async def analyze_similarity(content_1: str, content_2: str, level: str, score: float) -> dict:
+    """
+    Ask Gemini for a written originality assessment and detailed analysis.
+    
+    Returns:
+        dict with originality_assessment, detailed_analysis
+    """
+    # The prose depends on the locally computed level, so each level gets its own scope
+    scope = f"similarity:{level}"
+    vector, cached = await semantic_lookup(
+        scope, f"{content_1}\n\n{content_2}", SIMILARITY_CACHE_THRESHOLD
+    )
+    if cached is not None:
+        return cached
+
+    client = get_gemini_client()
+    
+    prompt = "".join([
+        _SIMILARITY_PROMPT_HEAD, content_1,
+        _SIMILARITY_PROMPT_TEXT_2, content_2,
+        _SIMILARITY_PROMPT_RATING, level,
+        _SIMILARITY_PROMPT_SCORE, f"{score:.2f}",
+        _SIMILARITY_PROMPT_TAIL,
+    ])
+
+    response = await client.aio.models.generate_content(
+        model=GEMINI_MODEL,
+        contents=prompt,
+        config=types.GenerateContentConfig(
+            temperature=SIMILARITY_TEMPERATURE,
+            max_output_tokens=400,
+            response_mime_type="application/json",
+            response_schema=SimilarityAnalysis
+        )
+    )
 
-Respond ONLY with valid JSON, no markdown formatting or code blocks."""
+    analysis = response.parsed
+    if analysis is None:
+        # Output did not match the schema (e.g. cut off by the token cap); never cached
+        return UncachedResult({
+            "originality_assessment": "Unable to assess due to processing error.",
+            "detailed_analysis": "Analysis failed: the model response was incomplete."
+        })
 
-        response = client.models.generate_content(
-            model="gemini-flash-lite-latest",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.2,
-                max_output_tokens=1024
-            )
-        )
-        
-        # Parse response
-        response_text = response.text.strip()
-        # Remove markdown code blocks if present
-        if response_text.startswith("```"):
-            lines = response_text.split("\n")
-            # Remove first and last lines (```json and ```)
-            response_text = "\n".join(lines[1:-1] if lines[-1] == "```" else lines[1:])
-        response_text = response_text.strip()
-        
-        result = json.loads(response_text)
-        
-        return {
-            "is_similar": bool(result.get("is_similar", False)),
-            "similarity_level": str(result.get("similarity_level", "different")),
-            "originality_assessment": str(result.get("originality_assessment", "Unable to assess originality.")),
-            "detailed_analysis": str(result.get("detailed_analysis", "Unable to provide detailed analysis."))
-        }
+    result = analysis.model_dump()
+
+    if vector is not None:
+        semantic_cache.insert(scope, vector, result)
+    return result
+
+
+# ==========================================================
+#   CORPUS SEARCH
+# ==========================================================
+async def find_similar(query: str, top_k: int = 5) -> list[dict]:
+    """
+    Find the stored contents most similar to the query.
+    Scores the whole store with one int8 matrix-vector product over the
+    quantized embedding matrix, then selects the top results without a
+    full sort. Scores are approximate cosine similarities (int8 rounding
+    error is around 1e-2).
+    
+    Args:
+        query: Text to search for
+        top_k: Maximum number of matches to return
         
-    except json.JSONDecodeError as e:
-        # If JSON parsing fails, return default with error info
-        return {
-            "is_similar": False,
-            "similarity_level": "different",
-            "originality_assessment": "Unable to assess due to processing error.",
-            "detailed_analysis": f"Analysis failed due to response parsing error: {str(e)}"
+    Returns:
+        list of dicts with id, title, content, score; best match first
+    """
+    async with _STORE_LOCK:
+        matrix, scales = await asyncio.to_thread(load_store_embeddings)
+        store = list(_STORE)
+
+    if not store:
+        return []
+
+    q = (await asyncio.to_thread(embed, [query]))[0]
+    sims = await asyncio.to_thread(int8_scores, matrix, scales, q)
+
+    k = min(top_k, len(sims))
+    top = np.argpartition(-sims, k - 1)[:k]
+    top = top[np.argsort(-sims[top])]
+
+    return [
+        {
+            "id": store[i].get("id"),
+            "title": store[i].get("title"),
+            "content": store[i].get("content", ""),
+            "score": float(sims[i]),
         }
-    except Exception as e:
-        raise Exception(f"Similarity check failed: {str(e)}")
+        for i in top
+    ]
 
 
 # ==========================================================
 #   SOCIAL CAPTION GENERATION
 # ==========================================================
+# Platform-specific instructions
+PLATFORM_GUIDES = MappingProxyType({
+    "instagram": "Use emojis, hashtags, and keep it engaging. Mention 'link in bio' for URLs. Max 2200 characters.",
+    "twitter": "Keep it concise (under 280 characters). Use relevant hashtags. Be punchy and shareable.",
+    "facebook": "Can be longer and more descriptive. Encourage engagement with questions or calls to action.",
+    "tiktok": "Use trendy language, emojis, and relevant hashtags. Keep it fun and casual.",
+    "linkedin": "Professional tone. Focus on value and insights. Use relevant industry hashtags.",
+})
+DEFAULT_PLATFORM_GUIDE = "Create an engaging caption suitable for social media."
+
+
+@lru_cache(maxsize=256)
+def normalize_platform(platform: str) -> str:
+    """Lowercase and intern a platform name (memoized; platform names repeat)."""
+    return sys.intern(platform.lower())
+
+
+def platform_guide_for(platform: str) -> str:
+    """Caption guidelines for a platform, with a generic fallback."""
+    return PLATFORM_GUIDES.get(normalize_platform(platform), DEFAULT_PLATFORM_GUIDE)
+
+
+@exact_cache(model=GEMINI_MODEL, temperature=CAPTION_TEMPERATURE)
 async def generate_social_caption(platform: str, title: str, description: str) -> dict:
     """
     Generate a social media caption for the given content.
@@ -155,40 +545,40 @@ async def generate_social_caption(platform: str, title: str, description: str) -
         dict with generated caption
     """
     try:
+        scope = f"caption:{normalize_platform(platform)}"
+        vector, cached = await semantic_lookup(
+            scope, f"{title}\n\n{description}", CAPTION_CACHE_THRESHOLD
+        )
+        if cached is not None:
+            return cached
+
         client = get_gemini_client()
         
-        # Platform-specific instructions
-        platform_guides = {
-            "instagram": "Use emojis, hashtags, and keep it engaging. Mention 'link in bio' for URLs. Max 2200 characters.",
-            "twitter": "Keep it concise (under 280 characters). Use relevant hashtags. Be punchy and shareable.",
-            "facebook": "Can be longer and more descriptive. Encourage engagement with questions or calls to action.",
-            "tiktok": "Use trendy language, emojis, and relevant hashtags. Keep it fun and casual.",
-            "linkedin": "Professional tone. Focus on value and insights. Use relevant industry hashtags.",
-        }
-        
-        platform_guide = platform_guides.get(platform.lower(), "Create an engaging caption suitable for social media.")
+        platform_guide = platform_guide_for(platform)
         
-        prompt = f"""Generate a social media caption for {platform}.
-
-Content Title: {title}
-Content Description: {description}
-
-Platform Guidelines: {platform_guide}
-
-Generate ONLY the caption text, nothing else. Do not include any explanations or metadata."""
-
-        response = client.models.generate_content(
-            model="gemini-flash-lite-latest",
+        prompt = "".join([
+            _CAPTION_PROMPT_HEAD, platform,
+            _CAPTION_PROMPT_TITLE, title,
+            _CAPTION_PROMPT_DESCRIPTION, description,
+            _CAPTION_PROMPT_GUIDE, platform_guide,
+            _CAPTION_PROMPT_TAIL,
+        ])
+
+        response = await client.aio.models.generate_content(
+            model=GEMINI_MODEL,
             contents=prompt,
             config=types.GenerateContentConfig(
-                temperature=0.7,
+                temperature=CAPTION_TEMPERATURE,
                 max_output_tokens=500
             )
         )
         
         caption = response.text.strip()
-        
-        return {"caption": caption}
+        result = {"caption": caption}
+
+        if vector is not None:
+            semantic_cache.insert(scope, vector, result)
+        return result
         
     except Exception as e:
         raise Exception(f"Caption generation failed: {str(e)}")
@@ -197,6 +587,18 @@ Generate ONLY the caption text, nothing else. Do not include any explanations or
 # ==========================================================
 #   TEXT SUMMARIZATION
 # ==========================================================
+SUMMARIZE_CONFIG = types.GenerateContentConfig(
+    temperature=SUMMARIZE_TEMPERATURE,
+    max_output_tokens=200
+)
+
+
+def summarize_prompt(content: str) -> str:
+    """Build the summarization prompt for the given content."""
+    return _SUMMARIZE_PROMPT_HEAD + content + _SUMMARIZE_PROMPT_TAIL
+
+
+@exact_cache(model=SUMMARIZE_MODEL, temperature=SUMMARIZE_TEMPERATURE)
 async def summarize_text(content: str) -> dict:
     """
     Summarize the given text content.
@@ -208,28 +610,98 @@ async def summarize_text(content: str) -> dict:
         dict with summary
     """
     try:
-        client = get_gemini_client()
-        
-        prompt = f"""Summarize the following content concisely. Focus on the key points and main takeaways.
-Keep the summary brief but informative.
+        vector, cached = await semantic_lookup("summarize", content, SUMMARIZE_CACHE_THRESHOLD)
+        if cached is not None:
+            return cached
 
-Content:
-{content}
-
-Provide ONLY the summary, nothing else."""
+        client = get_gemini_client()
 
-        response = client.models.generate_content(
-            model="gemini-flash-lite-latest",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.3,
-                max_output_tokens=300
-            )
+        response = await client.aio.models.generate_content(
+            model=SUMMARIZE_MODEL,
+            contents=summarize_prompt(content),
+            config=SUMMARIZE_CONFIG
         )
         
         summary = response.text.strip()
-        
-        return {"summary": summary}
+        result = {"summary": summary}
+
+        if vector is not None:
+            semantic_cache.insert("summarize", vector, result)
+        return result
         
     except Exception as e:
         raise Exception(f"Summarization failed: {str(e)}")
+
+
+async def summarize_texts(contents: list[str]) -> list[dict]:
+    """
+    Summarize several texts concurrently.
+    All Gemini calls are in flight at once, so a batch takes about as long
+    as its slowest item instead of the sum of all items.
+    
+    Args:
+        contents: Text contents to summarize
+        
+    Returns:
+        list of dicts with summary, in input order
+    """
+    return await asyncio.gather(*(summarize_text(content) for content in contents))
+
+
+async def stream_summary(content: str) -> AsyncIterator[str]:
+    """
+    Summarize the given text content, yielding text as Gemini generates it.
+    Closing this generator early (e.g. when the client disconnects) closes
+    the upstream stream, so Gemini stops generating.
+    
+    Args:
+        content: Text content to summarize
+        
+    Yields:
+        summary text chunks
+    """
+    client = get_gemini_client()
+    stream = await client.aio.models.generate_content_stream(
+        model=SUMMARIZE_MODEL,
+        contents=summarize_prompt(content),
+        config=SUMMARIZE_CONFIG
+    )
+    try:
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+    finally:
+        await stream.aclose()
+
+
+# ==========================================================
+#   WARMUP
+# ==========================================================
+async def warm_up():
+    """
+    Pay one-time costs at startup instead of on the first request:
+    embedding model load, numba compilation of the int8 scorer, and the
+    TLS/HTTP2 handshake of the Gemini connection pool (via a 1-token call).
+    Best effort: failures are reported and never block startup.
+    """
+    try:
+        vector = (await asyncio.to_thread(embed, ["warm up"]))[0]
+        codes, scales = quantize(vector)
+        await asyncio.to_thread(int8_scores, codes, scales, vector)
+    except Exception as e:
+        print(f"[Warning] Embedding warmup failed: {e}")
+
+    if not GEMINI_API_KEY:
+        return
+    try:
+        client = get_gemini_client()
+        await asyncio.wait_for(
+            client.aio.models.generate_content(
+                model=GEMINI_MODEL,
+                contents="ping",
+                config=types.GenerateContentConfig(max_output_tokens=1)
+            ),
+            timeout=10,
+        )
+    except Exception as e:
+        print(f"[Warning] Gemini warmup failed: {e}")
@@ -0,0 +1,104 @@
+# embeddings.py
+"""
+Local sentence embeddings for content services.
+Uses sentence-transformers (all-MiniLM-L6-v2, 384 dimensions) on CPU,
+so semantic lookups never need a round-trip to Gemini.
+
+Large indexes (the content store) are kept int8-quantized with one scale
+per row, a quarter of the float32 size, and scored with a JIT-compiled
+int8 dot product.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from numba import njit
+from sentence_transformers import SentenceTransformer
+
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+
+
+@lru_cache(maxsize=1)
+def get_embedding_model() -> SentenceTransformer:
+    """Load the embedding model once per process."""
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+
+def embed(texts: list[str]) -> np.ndarray:
+    """
+    Embed texts into L2-normalized vectors.
+
+    Returns:
+        float32 array of shape (len(texts), EMBEDDING_DIM); the dot product
+        of two rows is their cosine similarity.
+    """
+    model = get_embedding_model()
+    vectors = model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+    return vectors.astype(np.float32, copy=False)
+
+
+def fits_window(text: str) -> bool:
+    """
+    Check whether text fits the model's input window.
+    Longer texts are silently truncated by the model, so two inputs that only
+    differ after the cut-off would embed identically.
+    """
+    model = get_embedding_model()
+    token_ids = model.tokenizer(text, add_special_tokens=True, truncation=False)["input_ids"]
+    return len(token_ids) <= model.max_seq_length
+
+
+# ==========================================================
+#   INT8 QUANTIZATION
+# ==========================================================
+def quantize(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-row int8 quantization.
+
+    Returns:
+        (codes, scales): int8 array of the same shape and float32 array of
+        one scale per row, with vectors ~= codes * scales[:, None].
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    peak = np.abs(vectors).max(axis=1)
+    scales = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+# Single-threaded on purpose: callers run it from worker threads, and
+# numba's parallel threading layers are not safe to enter concurrently
+@njit(fastmath=True, cache=True)
+def _int8_scores(codes, scales, query, query_scale):
+    n, dim = codes.shape
+    out = np.empty(n, dtype=np.float32)
+    for i in range(n):
+        acc = np.int32(0)
+        for j in range(dim):
+            acc += np.int32(codes[i, j]) * np.int32(query[j])
+        out[i] = acc * scales[i] * query_scale
+    return out
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def int8_scores(codes: np.ndarray, scales: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    Approximate cosine similarity of a float32 query against every row of
+    an int8-quantized matrix (as returned by `quantize`).
+    Accumulates in int32, so the codes are never widened to float.
+    """
+    if len(codes) == 0:
+        return np.empty(0, dtype=np.float32)
+    q_codes, q_scales = quantize(query)
+    # numba compiles separately for read-only arrays; always passing
+    # read-only views keeps a single specialization, whether the index is
+    # memory-mapped from disk or held in memory
+    return _int8_scores(_read_only(codes), _read_only(scales), q_codes[0], q_scales[0])
+
@@ -10,10 +10,15 @@ Swagger UI:
     http://localhost:8000/docs
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, status
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from datetime import datetime
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from .schemas import (
     TrainModelRequest,
@@ -23,14 +28,21 @@ from .schemas import (
     PredictionRequest,
     PredictionResponse,
     HealthResponse,
+    MetricsResponse,
     ErrorResponse,
     DeleteResponse,
     SimilarityCheckRequest,
     SimilarityCheckResponse,
+    ContentItem,
+    ContentStoredResponse,
+    CorpusSearchRequest,
+    CorpusMatch,
+    CorpusSearchResponse,
     SocialCaptionRequest,
     SocialCaptionResponse,
     SummarizeRequest,
     SummarizeResponse,
+    SummarizeBatchRequest,
 )
 from .ml_pipeline import (
     train_model,
@@ -39,12 +51,24 @@ from .ml_pipeline import (
     update_status,
     delete_model,
     load_metadata,
+    flush_metadata,
+    metadata_etag,
+    now_iso,
+    start_metadata_flusher,
+    stop_metadata_flusher,
 )
 from .content_service import (
     check_similarity,
+    append_content,
+    compact_content_store,
+    find_similar,
     generate_social_caption,
     summarize_text,
+    summarize_texts,
+    stream_summary,
+    warm_up,
 )
+from .content_cache import save_semantic_cache, cache_stats
 
 
 # App Initialization
@@ -89,6 +113,55 @@ app.add_middleware(
 )
 
 
+# Training Workers
+
+TRAINING_WORKERS = os.cpu_count() or 1
+
+train_pool: ProcessPoolExecutor | None = None
+train_queue: asyncio.Queue | None = None
+train_consumers: list[asyncio.Task] = []
+
+
+def new_training_pool() -> ProcessPoolExecutor:
+    # Workers are spawned (not forked) so they start with clean module state
+    return ProcessPoolExecutor(
+        max_workers=TRAINING_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+# Lifecycle Events
+
+@app.on_event("startup")
+async def start_background_workers():
+    """Start batching metadata writes and the training workers, then warm up content services."""
+    global train_pool, train_queue
+
+    start_metadata_flusher()
+
+    train_pool = new_training_pool()
+    train_queue = asyncio.Queue()
+    for _ in range(TRAINING_WORKERS):
+        train_consumers.append(asyncio.create_task(run_training()))
+
+    await warm_up()
+
+
+@app.on_event("shutdown")
+async def persist_state():
+    """Stop training workers, flush pending metadata and persist content caches and the content store."""
+    for task in train_consumers:
+        task.cancel()
+    await asyncio.gather(*train_consumers, return_exceptions=True)
+    train_consumers.clear()
+    if train_pool is not None:
+        train_pool.shutdown(wait=False, cancel_futures=True)
+
+    await stop_metadata_flusher()
+    save_semantic_cache()
+    await compact_content_store()
+
+
 # Exception Handler
 
 @app.exception_handler(Exception)
@@ -105,21 +178,56 @@ async def global_exception_handler(request, exc):
 @app.get("/health", response_model=HealthResponse, tags=["System"], summary="Health check")
 async def health_check():
     """Check if API is running."""
-    return HealthResponse(
+    return HealthResponse.model_construct(
         status="ok",
-        timestamp=datetime.utcnow().isoformat() + "Z",
+        timestamp=now_iso(),
         version="1.7.0"
     )
 
 
+# Cache Metrics
+
+@app.get("/metrics", response_model=MetricsResponse, tags=["System"], summary="Cache metrics")
+async def metrics():
+    """Get hit/miss counters for the content service caches."""
+    return MetricsResponse(**cache_stats())
+
+
+# Conditional GET
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the client's If-None-Match header covers the given ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip() for tag in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
 # List Models
 
-@app.get("/models", response_model=ModelListResponse, tags=["Models"], summary="List all models")
-async def list_models():
-    """Get list of all registered models and their status."""
+@app.get(
+    "/models",
+    response_model=ModelListResponse,
+    tags=["Models"],
+    summary="List all models",
+    responses={304: {"description": "Not modified since the given ETag"}}
+)
+async def list_models(request: Request, response: Response):
+    """
+    Get list of all registered models and their status.
+    Supports conditional GET: send the last `ETag` as `If-None-Match` to get
+    `304 Not Modified` while nothing has changed.
+    """
+    etag = metadata_etag()
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
     metadata = load_metadata()
+    # Metadata is written by our own pipeline, so skip re-validating each entry
     models = [
-        ModelStatus(
+        ModelStatus.model_construct(
             id=model_id,
             status=info.get("status", "unknown"),
             updated_at=info.get("updated_at"),
@@ -130,7 +238,7 @@ async def list_models():
         )
         for model_id, info in metadata.items()
     ]
-    return ModelListResponse(models=models, count=len(models))
+    return ModelListResponse.model_construct(models=models, count=len(models))
 
 
 # Create Model (Start Training)
@@ -146,9 +254,11 @@ async def list_models():
         409: {"description": "Model ID already exists", "model": ErrorResponse},
     }
 )
-async def create_model(request: TrainModelRequest, background_tasks: BackgroundTasks):
+async def create_model(request: TrainModelRequest):
     """
-    Accepts any dataset to train the model.
+    Accepts any dataset to train the model, either as a list of records or
+    column-oriented (`{"column": [values, ...], ...}`), which skips the
+    per-record conversion.
     
     **Data Processing Note:** Multivalued columns (arrays, lists, nested objects) 
     will be automatically **dropped** during preprocessing. Only flat fields 
@@ -170,7 +280,7 @@ async def create_model(request: TrainModelRequest, background_tasks: BackgroundT
 
     # Queue training
     update_status(model_id, "queued")
-    background_tasks.add_task(run_training, model_id, request.target_col, request.training_data)
+    await train_queue.put((model_id, request.target_col, request.training_data))
 
     return TrainModelResponse(
         id=model_id,
@@ -179,10 +289,44 @@ async def create_model(request: TrainModelRequest, background_tasks: BackgroundT
     )
 
 
-def run_training(model_id: str, target_col: str, training_data: list):
-    """Background task: run model training."""
-    update_status(model_id, "training")
-    train_model(model_id, target_col, training_data)
+async def run_training():
+    """
+    Training worker: take queued jobs and run them in the process pool.
+    Training is CPU-bound, so it runs in a separate process and never
+    blocks request handling; concurrency is capped at TRAINING_WORKERS.
+    """
+    global train_pool
+
+    loop = asyncio.get_running_loop()
+    while True:
+        model_id, target_col, training_data = await train_queue.get()
+        try:
+            # Skip jobs whose model was deleted while queued
+            if get_status(model_id).get("status") == "not_found":
+                continue
+
+            update_status(model_id, "training")
+            # The worker process writes the model's metadata itself; flush first so
+            # our pending entry cannot overwrite its result later
+            flush_metadata()
+            pool = train_pool
+            try:
+                await loop.run_in_executor(pool, train_model, model_id, target_col, training_data)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); the pool rejects all further
+                # work, so replace it once (other consumers may see the same pool)
+                if train_pool is pool:
+                    print("[Training] Worker process died, restarting the training pool")
+                    train_pool = new_training_pool()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                raise
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Training] Worker failed for '{model_id}': {e}")
+            update_status(model_id, "failed")
+        finally:
+            train_queue.task_done()
 
 
 # Get Model Status
@@ -192,10 +336,20 @@ def run_training(model_id: str, target_col: str, training_data: list):
     response_model=ModelStatus,
     tags=["Models"],
     summary="Get model status",
-    responses={404: {"description": "Model not found", "model": ErrorResponse}}
+    responses={
+        304: {"description": "Not modified since the given ETag"},
+        404: {"description": "Model not found", "model": ErrorResponse},
+    }
 )
-async def get_model_status(model_id: str):
-    """Get current status of a model."""
+async def get_model_status(model_id: str, request: Request, response: Response):
+    """
+    Get current status of a model.
+    Supports conditional GET via `ETag` / `If-None-Match`.
+    """
+    etag = metadata_etag(model_id)
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
     info = get_status(model_id)
 
     if info.get("status") == "not_found":
@@ -204,7 +358,8 @@ async def get_model_status(model_id: str):
             detail={"error": "not_found", "message": f"Model '{model_id}' not found"}
         )
 
-    return ModelStatus(
+    response.headers["ETag"] = etag
+    return ModelStatus.model_construct(
         id=model_id,
         status=info.get("status"),
         updated_at=info.get("updated_at"),
@@ -234,7 +389,7 @@ async def remove_model(model_id: str):
             detail={"error": "not_found", "message": f"Model '{model_id}' not found"}
         )
 
-    return DeleteResponse(id=model_id, status="deleted", message="Model successfully deleted")
+    return DeleteResponse.model_construct(id=model_id, status="deleted", message="Model successfully deleted")
 
 
 # Make Prediction
@@ -304,14 +459,20 @@ async def make_prediction(model_id: str, request: PredictionRequest):
 async def similarity_check(request: SimilarityCheckRequest):
     """
     Check similarity between two provided contents.
-    Uses Gemini AI to analyze semantic similarity and originality.
-    Returns detailed analysis including similarity level, originality assessment, and explanation.
+    Similarity is scored locally with sentence embeddings. Set
+    `include_detailed_analysis` to have Gemini write the originality assessment
+    and detailed analysis.
     """
     try:
-        result = await check_similarity(request.content_1, request.content_2)
+        result = await check_similarity(
+            request.content_1,
+            request.content_2,
+            request.include_detailed_analysis
+        )
         return SimilarityCheckResponse(
             is_similar=result["is_similar"],
             similarity_level=result["similarity_level"],
+            similarity_score=result["similarity_score"],
             originality_assessment=result["originality_assessment"],
             detailed_analysis=result["detailed_analysis"]
         )
@@ -322,6 +483,60 @@ async def similarity_check(request: SimilarityCheckRequest):
         )
 
 
+# Content Corpus
+
+@app.post(
+    "/content/corpus",
+    response_model=ContentStoredResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Predictia"],
+    summary="Store Content",
+    responses={
+        500: {"description": "Storing content failed", "model": ErrorResponse},
+    }
+)
+async def store_content(request: ContentItem):
+    """
+    Add content to the similarity corpus.
+    Storing an existing id replaces the previous content.
+    """
+    try:
+        await append_content(request.model_dump())
+        return ContentStoredResponse(id=request.id, status="stored")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": "content_store_failed", "message": str(e)}
+        )
+
+
+@app.post(
+    "/content/corpus/search",
+    response_model=CorpusSearchResponse,
+    tags=["Predictia"],
+    summary="Search Similar Content",
+    responses={
+        500: {"description": "Corpus search failed", "model": ErrorResponse},
+    }
+)
+async def search_corpus(request: CorpusSearchRequest):
+    """
+    Find the stored contents most similar to the query.
+    Results are ordered by similarity score, best match first.
+    """
+    try:
+        matches = await find_similar(request.query, request.top_k)
+        return CorpusSearchResponse(
+            matches=[CorpusMatch(**match) for match in matches],
+            count=len(matches)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": "corpus_search_failed", "message": str(e)}
+        )
+
+
 # Social Caption Generation
 
 @app.post(
@@ -378,6 +593,74 @@ async def summarize(request: SummarizeRequest):
         )
 
 
+# Streaming Summarization
+
+@app.post(
+    "/summarize/stream",
+    response_class=StreamingResponse,
+    tags=["Predictia"],
+    summary="Summarize Text (Streaming)",
+    responses={
+        200: {"description": "Summary streamed as plain text", "content": {"text/plain": {}}},
+        500: {"description": "Summarization failed", "model": ErrorResponse},
+    }
+)
+async def summarize_stream(request: SummarizeRequest, http_request: Request):
+    """
+    Summarize text content, streaming the summary as it is generated.
+    Generation stops as soon as the client disconnects.
+    """
+    chunks = stream_summary(request.content)
+
+    # Wait for the first chunk so upstream errors still produce a 500
+    try:
+        first = await anext(chunks, "")
+    except Exception as e:
+        await chunks.aclose()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": "summarization_failed", "message": f"Summarization failed: {str(e)}"}
+        )
+
+    async def body():
+        try:
+            yield first
+            async for text in chunks:
+                if await http_request.is_disconnected():
+                    break
+                yield text
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(body(), media_type="text/plain; charset=utf-8")
+
+
+# Batch Summarization
+
+@app.post(
+    "/content/summarize-batch",
+    response_model=list[SummarizeResponse],
+    tags=["Predictia"],
+    summary="Summarize Texts (Batch)",
+    responses={
+        500: {"description": "Summarization failed", "model": ErrorResponse},
+    }
+)
+async def summarize_batch(request: SummarizeBatchRequest):
+    """
+    Summarize multiple texts in one request.
+    Gemini calls run concurrently; summaries are returned in input order.
+    """
+    try:
+        results = await summarize_texts(request.contents)
+        return [SummarizeResponse(summary=result["summary"]) for result in results]
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": "summarization_failed", "message": str(e)}
+        )
+
+
 # Root
 
 @app.get("/", tags=["System"], include_in_schema=False)
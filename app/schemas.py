@@ -4,28 +4,59 @@ Pydantic schema definitions for API request/response validation.
 Aligned with Predictia – 8EH Radio ITB Integrated API v1.7.0
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Any
 
 
+def check_columnar(data):
+    """Columnar data (column name -> values) must have equally long, non-empty columns."""
+    if isinstance(data, dict):
+        lengths = {len(values) for values in data.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same number of values")
+        if lengths == {0}:
+            raise ValueError("Columns must contain at least one value")
+    return data
+
+
 # ==========================================================
 # FLOW 1: TRAINING
 # ==========================================================
 
 class TrainModelRequest(BaseModel):
     """POST /training request body."""
-    id: str = Field(..., description="Unique model identifier", examples=["8eh-blog-engagement-v1"])
+    id: str = Field(
+        ...,
+        description="Unique model identifier: letters, digits, '.', '_' and '-' (starting with a letter or digit), at most 128 characters",
+        pattern=r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$",
+        examples=["8eh-blog-engagement-v1"]
+    )
     target_col: str = Field(..., description="Target column name", examples=["readercount"])
-    training_data: list[dict[str, Any]] = Field(
+    training_data: list[dict[str, Any]] | dict[str, list[Any]] = Field(
         ...,
-        description="Training data as list of dicts. Multivalued columns (arrays, nested objects) are automatically dropped.",
+        description=(
+            "Training data as list of dicts, or column-oriented as a dict of equally long lists. "
+            "Multivalued columns (arrays, nested objects) are automatically dropped."
+        ),
         min_length=1,
-        examples=[[
-            {"id": "clx123abc", "title": "Mengenal Lebih Dekat 8EH Radio ITB", "category": "News", "readTime": "5 min read", "readercount": 4521},
-            {"id": "clx987xyz", "title": "Top 10 Indie Bands", "category": "Music", "readTime": "8 min read", "readercount": 3105}
-        ]]
+        examples=[
+            [
+                {"id": "clx123abc", "title": "Mengenal Lebih Dekat 8EH Radio ITB", "category": "News", "readTime": "5 min read", "readercount": 4521},
+                {"id": "clx987xyz", "title": "Top 10 Indie Bands", "category": "Music", "readTime": "8 min read", "readercount": 3105}
+            ],
+            {
+                "title": ["Mengenal Lebih Dekat 8EH Radio ITB", "Top 10 Indie Bands"],
+                "category": ["News", "Music"],
+                "readercount": [4521, 3105]
+            }
+        ]
     )
 
+    @field_validator("training_data")
+    @classmethod
+    def check_columns(cls, value):
+        return check_columnar(value)
+
 
 class TrainModelResponse(BaseModel):
     """POST /training response body (202 Accepted)."""
@@ -40,15 +71,23 @@ class TrainModelResponse(BaseModel):
 
 class PredictionRequest(BaseModel):
     """POST /predictions/{model_id} request body."""
-    input_data: list[dict[str, Any]] = Field(
+    input_data: list[dict[str, Any]] | dict[str, list[Any]] = Field(
         ...,
-        description="Input data for prediction (without target column)",
+        description="Input data for prediction (without target column), as list of dicts or as a dict of equally long lists",
         min_length=1,
-        examples=[[
-            {"id": "clx444new", "title": "Review: Jazz Festival 2024", "category": "Music", "readTime": "7 min read"}
-        ]]
+        examples=[
+            [
+                {"id": "clx444new", "title": "Review: Jazz Festival 2024", "category": "Music", "readTime": "7 min read"}
+            ],
+            {"title": ["Review: Jazz Festival 2024"], "category": ["Music"], "readTime": ["7 min read"]}
+        ]
     )
 
+    @field_validator("input_data")
+    @classmethod
+    def check_columns(cls, value):
+        return check_columnar(value)
+
 
 class PredictionResponse(BaseModel):
     """POST /predictions/{model_id} response body."""
@@ -63,16 +102,51 @@ class SimilarityCheckRequest(BaseModel):
     """POST /content/similarity-check request body."""
     content_1: str = Field(..., description="First content to compare", examples=["This is the first article about radio history."])
     content_2: str = Field(..., description="Second content to compare", examples=["This article discusses the origins of radio broadcasting."])
+    include_detailed_analysis: bool = Field(False, description="Use Gemini to write the originality assessment and detailed analysis (slower)")
 
 
 class SimilarityCheckResponse(BaseModel):
     """POST /content/similarity-check response body."""
     is_similar: bool = Field(..., description="Whether the contents are similar", examples=[True])
     similarity_level: str = Field(..., description="Level of similarity: 'identical', 'very_similar', 'similar', 'somewhat_similar', 'different'", examples=["very_similar"])
+    similarity_score: float = Field(..., description="Cosine similarity of the sentence embeddings (-1 to 1)", examples=[0.89])
     originality_assessment: str = Field(..., description="Assessment of originality for content_1 compared to content_2", examples=["The first content appears to be an original take on the topic..."])
     detailed_analysis: str = Field(..., description="Detailed analysis of similarities and differences", examples=["Both contents discuss radio history but from different perspectives..."])
 
 
+class ContentItem(BaseModel):
+    """POST /content/corpus request body."""
+    id: str = Field(..., description="Unique content identifier; storing an existing id replaces it", examples=["clx456def"])
+    title: Optional[str] = Field(None, description="Content title", examples=["Radio History Podcast"])
+    content: str = Field(..., description="Content text to index", examples=["The origins of 8EH Radio ITB date back to..."])
+
+
+class ContentStoredResponse(BaseModel):
+    """POST /content/corpus response body."""
+    id: str
+    status: str = Field(default="stored")
+
+
+class CorpusSearchRequest(BaseModel):
+    """POST /content/corpus/search request body."""
+    query: str = Field(..., description="Content to search the corpus for", examples=["A script about the station's early years."])
+    top_k: int = Field(5, description="Maximum number of matches", ge=1, le=50)
+
+
+class CorpusMatch(BaseModel):
+    """A stored content item matching a corpus search."""
+    id: Optional[str] = None
+    title: Optional[str] = None
+    content: str
+    score: float = Field(..., description="Cosine similarity to the query (-1 to 1)", examples=[0.81])
+
+
+class CorpusSearchResponse(BaseModel):
+    """POST /content/corpus/search response body."""
+    matches: list[CorpusMatch]
+    count: int
+
+
 # ==========================================================
 # FLOW 4: SOCIAL CAPTIONS
 # ==========================================================
@@ -103,6 +177,17 @@ class SummarizeResponse(BaseModel):
     summary: str = Field(..., description="Generated summary", examples=["Nadin Amizah remains at #1 this week."])
 
 
+class SummarizeBatchRequest(BaseModel):
+    """POST /content/summarize-batch request body."""
+    contents: list[str] = Field(
+        ...,
+        description="Contents to summarize; all items are processed concurrently",
+        min_length=1,
+        max_length=50,
+        examples=[["Tune Tracker 2023-10-23. Rank 1: 'Rayuan Perempuan Gila' (stable).", "Morning Show recap: indie band interview."]]
+    )
+
+
 # ==========================================================
 # MODEL MANAGEMENT
 # ==========================================================
@@ -135,6 +220,19 @@ class HealthResponse(BaseModel):
     version: str = Field(default="1.7.0")
 
 
+class CacheMetrics(BaseModel):
+    """Counters for one content service cache layer."""
+    hits: int = Field(..., description="Requests answered from the cache")
+    misses: int = Field(..., description="Requests that had to call Gemini")
+    size: int = Field(..., description="Number of cached responses")
+
+
+class MetricsResponse(BaseModel):
+    """GET /metrics response body."""
+    exact_cache: CacheMetrics
+    semantic_cache: CacheMetrics
+
+
 class ErrorResponse(BaseModel):
     """Common error response format."""
     error: str = Field(..., description="Error type")